@@ -1,6 +1,8 @@
-from flask import Flask, request, jsonify, session
+from flask import Flask, request, jsonify, session, Response, stream_with_context
 from datetime import datetime, timedelta
 from models import *
+from exportacion import generar_exportacion
+import shards
 import random
 import string
 import os
@@ -8,15 +10,17 @@ from flask_cors import CORS
 from flask import render_template
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///autenticacion.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///autenticacion.db')
 app.config['SECRET_KEY'] = os.urandom(24)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 db.init_app(app)
+shards.init_app(app, db)
 
-# Crear tablas al iniciar
+# Crear tablas al iniciar y actualizar bases creadas con versiones anteriores
 with app.app_context():
     db.create_all()
+    actualizar_esquema(db.engine)
 
 
 def generar_usuario(nombre, apellido):
@@ -40,7 +44,7 @@ def generar_password():
 def obtener_ip():
     """Obtener IP del cliente"""
     if request.headers.get('X-Forwarded-For'):
-        return request.headers.get('X-Forwarded-For').split(',')[0]
+        return request.headers.get('X-Forwarded-For').split(',')[0].strip()[:50]
     return request.remote_addr or '127.0.0.1'
 
 
@@ -182,36 +186,44 @@ def login():
         data = request.json
         ip = obtener_ip()
         
-        usuario = Usuario.query.filter_by(usuario=data['usuario']).first()
+        nombre = data.get('usuario')
+        password = data.get('password')
+        if not isinstance(password, str):
+            password = ''
+        
+        # Un nombre que no puede existir (Usuario.usuario es String(50)) no se
+        # busca ni se registra, pero cuesta el mismo hash y recibe el mismo 401
+        if not isinstance(nombre, str) or len(nombre) > 50:
+            verificar_password_ficticia(password)
+            return jsonify({'error': 'Credenciales inválidas'}), 401
+        
+        usuario = Usuario.query.filter_by(usuario=nombre).first()
+        
+        # Calcular siempre un único hash por petición: con el usuario real o
+        # con el hash ficticio, para que el tiempo no revele si el usuario existe
+        if usuario:
+            password_valida = usuario.check_password(password)
+        else:
+            password_valida = verificar_password_ficticia(password)
         
-        # Validar usuario existe
+        # Usuario inexistente: registrar el intento igual que un fallo real,
+        # con la misma respuesta y una única escritura en la base de datos
         if not usuario:
+            registrar_acceso(None, nombre, ip, 'fallido')
             return jsonify({'error': 'Credenciales inválidas'}), 401
         
-        # RS6: Verificar si está bloqueado (4 intentos)
-        if usuario.intentosFallidos >= 4:
-            registrar_acceso(usuario.idUser, data['usuario'], ip, 'bloqueado')
-            return jsonify({
-                'error': 'Usuario bloqueado por múltiples intentos fallidos',
-                'nota': 'Contacte al administrador para desbloquear'
-            }), 403
+        # RS6: Un usuario bloqueado (4 intentos) recibe la misma respuesta que
+        # una contraseña incorrecta, para no confirmar la contraseña
+        bloqueado = usuario.intentosFallidos >= 4
+        if bloqueado or not password_valida:
+            usuario.intentosFallidos += 1
+            registrar_acceso(usuario.idUser, nombre, ip, 'bloqueado' if bloqueado else 'fallido')
+            return jsonify({'error': 'Credenciales inválidas'}), 401
         
-        # Verificar estado de la cuenta
+        # Verificar estado de la cuenta (solo con contraseña correcta)
         if usuario.estado != 'activo':
             return jsonify({'error': f'Cuenta {usuario.estado}'}), 403
         
-        # Verificar contraseña
-        if not usuario.check_password(data['password']):
-            usuario.intentosFallidos += 1
-            db.session.commit()
-            registrar_acceso(usuario.idUser, data['usuario'], ip, 'fallido')
-            
-            intentos_restantes = 4 - usuario.intentosFallidos
-            return jsonify({
-                'error': 'Credenciales inválidas',
-                'intentos_restantes': intentos_restantes
-            }), 401
-        
         # RS5: Verificar si ya tiene sesión activa
         sesion_activa = Sesion.query.filter_by(
             idUser=usuario.idUser,
@@ -238,7 +250,7 @@ def login():
         db.session.add(codigo)
         db.session.commit()
         
-        registrar_acceso(usuario.idUser, data['usuario'], ip, 'login_exitoso')
+        registrar_acceso(usuario.idUser, nombre, ip, 'login_exitoso')
         
         return jsonify({
             'mensaje': 'Login exitoso. Ingrese código de segundo factor',
@@ -246,9 +258,10 @@ def login():
             'usuario_id': usuario.idUser
         }), 200
         
-    except Exception as e:
+    except Exception:
+        # Sin detalles: el texto de la excepción podría revelar si el usuario existe
         db.session.rollback()
-        return jsonify({'error': str(e)}), 500
+        return jsonify({'error': 'Error interno'}), 500
 
 
 @app.route('/api/verificar-segundo-factor', methods=['POST'])
@@ -329,6 +342,16 @@ def obtener_auditoria():
     return jsonify(resultado), 200
 
 
+@app.route('/api/auditoria/exportar', methods=['GET'])
+def exportar_auditoria():
+    """RS3: Exportar todo el registro de accesos en formato binario compacto"""
+    return Response(
+        stream_with_context(generar_exportacion()),
+        mimetype='application/octet-stream',
+        headers={'Content-Disposition': 'attachment; filename=accesos.racc'}
+    )
+
+
 # ==================== RS4: RECUPERAR CONTRASEÑA ====================
 @app.route('/api/recuperar-cuenta', methods=['POST'])
 def recuperar_cuenta():
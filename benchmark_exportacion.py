@@ -0,0 +1,136 @@
+"""
+Benchmark de exportación del registro de accesos: compara el formato JSON
+de /api/auditoria con el formato binario de exportacion.py.
+
+Uso:
+    python benchmark_exportacion.py [--registros 200000]
+
+Usa una base de datos SQLite temporal con registros sintéticos, sin tocar
+autenticacion.db.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from models import *
+from exportacion import exportar_registros, leer_lotes, leer_registros
+
+RESULTADOS = ['login_exitoso', 'fallido', 'bloqueado', 'acceso_completo']
+TIPOS = [None, 'web', 'api']
+
+# Fila con valores de más de 64 KiB y sin idUser, como las que puede dejar un
+# cliente en usuario o X-Forwarded-For; debe exportarse y leerse sin cambios
+FILA_GRANDE = {
+    'usuario': 'u' * 70000,
+    'fechaHora': datetime(2024, 1, 1),
+    'ipAcceso': 'x' * 70000,
+    'resultado': 'fallido',
+    'tipoAcceso': None,
+    'idUser': None,
+}
+
+
+def crear_app(ruta_db):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{ruta_db}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def poblar(cantidad, lote=10000):
+    """Insertar registros de acceso sintéticos"""
+    usuarios = []
+    for i in range(50):
+        cliente = Cliente(nombre='Bench', apellido='Export', mail=f'bench{i}@example.com', telefono=0)
+        db.session.add(cliente)
+        db.session.flush()
+        usuario = Usuario(usuario=f'bench{i:03d}', contrasena='-', idCli=cliente.idCli, estado='activo')
+        db.session.add(usuario)
+        db.session.flush()
+        usuarios.append(usuario)
+
+    inicio = datetime(2024, 1, 1)
+    for desde in range(0, cantidad, lote):
+        filas = []
+        for i in range(desde, min(desde + lote, cantidad)):
+            usuario = random.choice(usuarios)
+            filas.append({
+                'usuario': usuario.usuario,
+                'fechaHora': inicio + timedelta(seconds=i * 7, microseconds=random.randint(0, 999999)),
+                'ipAcceso': f'10.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}',
+                'resultado': random.choice(RESULTADOS),
+                'tipoAcceso': random.choice(TIPOS),
+                'idUser': usuario.idUser,
+            })
+        db.session.execute(db.insert(RegistroAcceso), filas)
+    db.session.execute(db.insert(RegistroAcceso), [FILA_GRANDE])
+    db.session.commit()
+
+
+def exportar_json():
+    """Mismo formato que /api/auditoria, sin límite de registros"""
+    registros = RegistroAcceso.query.order_by(RegistroAcceso.idRegistro).all()
+    return json.dumps([{
+        'id': r.idRegistro,
+        'usuario': r.usuario,
+        'fecha': r.fechaHora.strftime('%Y-%m-%d %H:%M:%S'),
+        'ip': r.ipAcceso,
+        'resultado': r.resultado,
+        'tipo': r.tipoAcceso
+    } for r in registros]).encode('utf-8')
+
+
+def cronometrar(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--registros', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        app = crear_app(os.path.join(directorio, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            poblar(args.registros)
+            db.session.expunge_all()
+
+            datos_json, t_json = cronometrar(exportar_json)
+            db.session.expunge_all()
+
+            salida = io.BytesIO()
+            _, t_binario = cronometrar(lambda: exportar_registros(salida))
+            datos_binario = salida.getvalue()
+            db.session.remove()
+
+    _, t_leer_json = cronometrar(lambda: json.loads(datos_json))
+    leidos, t_leer_lotes = cronometrar(lambda: sum(len(l['id']) for l in leer_lotes(io.BytesIO(datos_binario))))
+    assert leidos == args.registros + 1
+    leidos, t_leer_binario = cronometrar(lambda: sum(1 for _ in leer_registros(io.BytesIO(datos_binario))))
+    assert leidos == args.registros + 1
+
+    ultimo = list(leer_registros(io.BytesIO(datos_binario)))[-1]
+    assert (ultimo['usuario'], ultimo['ip'], ultimo['id_usuario']) == (FILA_GRANDE['usuario'], FILA_GRANDE['ipAcceso'], None)
+
+    print(f"{args.registros} registros (+1 fila de más de 64 KiB)")
+    print(f"{'formato':<10} {'tamaño':>14} {'exportar':>10} {'leer':>10}")
+    print(f"{'json':<10} {len(datos_json):>12} B {t_json:>9.2f}s {t_leer_json:>9.2f}s")
+    print(f"{'binario':<10} {len(datos_binario):>12} B {t_binario:>9.2f}s {t_leer_binario:>9.2f}s")
+    print(f"Lectura binaria por columnas (leer_lotes): {t_leer_lotes:.2f}s")
+    print("leer_registros además arma un dict por fila con fechaHora como datetime; JSON deja la fecha como texto")
+    print(f"Reducción de tamaño: {len(datos_json) / len(datos_binario):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
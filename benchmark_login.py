@@ -0,0 +1,124 @@
+"""
+Benchmark de /api/login: compara la latencia de intentos fallidos con un
+usuario existente y con un usuario inexistente.
+
+Uso:
+    python benchmark_login.py [--muestras 200] [--alfa 0.01]
+
+Aplica la prueba de Kolmogorov-Smirnov de dos muestras a ambas
+distribuciones y termina con código 1 si se detecta diferencia significativa.
+
+Usa una base de datos SQLite temporal, sin tocar autenticacion.db.
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from models import *
+
+
+def ks_dos_muestras(a, b):
+    """Estadístico D y p-valor asintótico de Kolmogorov-Smirnov"""
+    a, b = sorted(a), sorted(b)
+    n, m = len(a), len(b)
+    i = j = 0
+    d = 0.0
+    while i < n and j < m:
+        x = min(a[i], b[j])
+        while i < n and a[i] <= x:
+            i += 1
+        while j < m and b[j] <= x:
+            j += 1
+        d = max(d, abs(i / n - j / m))
+
+    ne = n * m / (n + m)
+    lam = (math.sqrt(ne) + 0.12 + 0.11 / math.sqrt(ne)) * d
+    p = 2 * sum((-1) ** (k - 1) * math.exp(-2 * k * k * lam * lam) for k in range(1, 101))
+    return d, min(max(p, 0.0), 1.0)
+
+
+def percentil(valores, q):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))]
+
+
+def resumen(nombre, latencias, cpu):
+    print(f"{nombre:<12} mediana={statistics.median(latencias) * 1000:8.2f} ms  "
+          f"p95={percentil(latencias, 0.95) * 1000:8.2f} ms  "
+          f"cpu/intento={statistics.mean(cpu) * 1000:8.2f} ms")
+
+
+def crear_usuario_prueba():
+    """Crear un usuario activo para el benchmark"""
+    cliente = Cliente(nombre='Bench', apellido='Login', mail='bench@example.com', telefono=0)
+    db.session.add(cliente)
+    db.session.flush()
+    usuario = Usuario(usuario='benchlogin', idCli=cliente.idCli, estado='activo')
+    usuario.set_password('password-correcta')
+    db.session.add(usuario)
+    db.session.commit()
+    return usuario
+
+
+def medir(cliente_http, usuario):
+    inicio_cpu = time.process_time()
+    inicio = time.perf_counter()
+    respuesta = cliente_http.post('/api/login', json={'usuario': usuario, 'password': 'incorrecta'})
+    latencia = time.perf_counter() - inicio
+    cpu = time.process_time() - inicio_cpu
+    assert respuesta.status_code == 401, respuesta.get_json()
+    return latencia, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--muestras', type=int, default=200)
+    parser.add_argument('--alfa', type=float, default=0.01)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        # La aplicación lee DATABASE_URL al importarse
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+        from app import app
+
+        with app.app_context():
+            usuario = crear_usuario_prueba()
+            cliente_http = app.test_client()
+            existente, inexistente = [], []
+            cpu_existente, cpu_inexistente = [], []
+
+            # Calentamiento
+            medir(cliente_http, f'{usuario.usuario}-no-existe')
+
+            # Intercalar ambos casos para que el ruido del sistema afecte por igual
+            for _ in range(args.muestras):
+                # Medir siempre el camino de contraseña incorrecta, no el de bloqueo
+                Usuario.query.filter_by(idUser=usuario.idUser).update({'intentosFallidos': 0})
+                db.session.commit()
+                latencia, cpu = medir(cliente_http, usuario.usuario)
+                existente.append(latencia)
+                cpu_existente.append(cpu)
+
+                latencia, cpu = medir(cliente_http, f'{usuario.usuario}-no-existe')
+                inexistente.append(latencia)
+                cpu_inexistente.append(cpu)
+            db.session.remove()
+
+    resumen('existente', existente, cpu_existente)
+    resumen('inexistente', inexistente, cpu_inexistente)
+
+    d, p = ks_dos_muestras(existente, inexistente)
+    print(f"Kolmogorov-Smirnov: D={d:.4f} p={p:.4f} (alfa={args.alfa})")
+    if p < args.alfa:
+        print("Las distribuciones son distinguibles")
+        return 1
+    print("Las distribuciones no son distinguibles")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
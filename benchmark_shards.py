@@ -0,0 +1,81 @@
+"""
+Benchmark de escritura con shards: mide el throughput agregado de inserciones
+en registro_acceso repartiendo varios escritores concurrentes entre 1, 2, 4...
+archivos SQLite.
+
+Uso:
+    python benchmark_shards.py [--escritores 8] [--segundos 5] [--shards 1 2 4 8]
+
+Cada escritura es un INSERT + COMMIT, igual que registrar_acceso. Usa un
+directorio temporal, sin tocar autenticacion.db.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models import db, RegistroAcceso
+from shards import RegistroShards
+
+
+def escritor(engine, fin, contador, indice):
+    escrituras = 0
+    with Session(engine) as sesion:
+        while time.perf_counter() < fin:
+            sesion.execute(insert(RegistroAcceso), {
+                'usuario': f'bench{indice}',
+                'fechaHora': datetime.utcnow(),
+                'ipAcceso': '127.0.0.1',
+                'resultado': 'fallido',
+                'idUser': indice,
+            })
+            sesion.commit()
+            escrituras += 1
+    contador[indice] = escrituras
+
+
+def medir(cantidad_shards, escritores, segundos):
+    """Escrituras por segundo con los escritores repartidos entre los shards"""
+    with tempfile.TemporaryDirectory() as directorio:
+        registro = RegistroShards(directorio, os.path.join(directorio, 'shards.json'), db.metadata)
+        engines = [registro.crear(f'tenant{i}') for i in range(cantidad_shards)]
+
+        contador = [0] * escritores
+        fin = time.perf_counter() + segundos
+        hilos = [
+            threading.Thread(target=escritor, args=(engines[i % cantidad_shards], fin, contador, i))
+            for i in range(escritores)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        for engine in engines:
+            engine.dispose()
+    return sum(contador) / segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escritores', type=int, default=8)
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    base = None
+    print(f"{args.escritores} escritores, {args.segundos:g} s por medición")
+    print(f"{'shards':>6} {'escrituras/s':>14} {'aceleración':>12}")
+    for cantidad in args.shards:
+        throughput = medir(cantidad, args.escritores, args.segundos)
+        base = base or throughput
+        print(f"{cantidad:>6} {throughput:>14.0f} {throughput / base:>11.2f}x")
+
+
+if __name__ == '__main__':
+    main()
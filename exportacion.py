@@ -0,0 +1,287 @@
+"""
+RS3: Exportación compacta del registro de accesos.
+
+Formato binario por columnas:
+
+    cabecera: b'RACC' + versión (1 byte)
+    lote:     longitud comprimida (uint32) + filas (uint32) + datos zlib
+    final:    longitud 0 (uint32) + 0 (uint32) + total de filas (uint64)
+              + total de lotes (uint32)
+
+Un archivo sin final, o cuyos totales no coinciden, está incompleto.
+
+Cada lote contiene, en orden, las columnas:
+
+    idRegistro  int64 por fila
+    fechaHora   int64 por fila, microsegundos desde epoch (UTC)
+    idUser      int64 por fila (NULO_ENTERO = usuario inexistente)
+    usuario     diccionario (longitudes uint32 + texto) + índices uint32
+    resultado   diccionario + índices uint32
+    tipoAcceso  diccionario + índices uint32 (NULO_INDICE = None)
+    ipAcceso    tipo por fila (1 byte), luego todas las IPv4 (4 bytes),
+                todas las IPv6 (16 bytes) y, para los valores que no se
+                pueden empaquetar sin cambiar el texto, longitudes uint32
+                + texto
+
+Uso:
+    python exportacion.py exportar accesos.racc
+    python exportacion.py leer accesos.racc
+"""
+import socket
+import struct
+import sys
+import zlib
+from datetime import datetime, timedelta
+
+from models import db, RegistroAcceso
+
+MAGIA = b'RACC'
+VERSION = 3
+TAMANO_LOTE = 10000
+NIVEL_COMPRESION = 6
+
+NULO_ENTERO = -2 ** 63
+NULO_INDICE = 0xFFFFFFFF
+
+IP_TEXTO, IP_V4, IP_V6 = 0, 4, 6
+
+EPOCH = datetime(1970, 1, 1)
+MICROSEGUNDO = timedelta(microseconds=1)
+
+COLUMNAS = [
+    RegistroAcceso.idRegistro,
+    RegistroAcceso.fechaHora,
+    RegistroAcceso.idUser,
+    RegistroAcceso.usuario,
+    RegistroAcceso.resultado,
+    RegistroAcceso.tipoAcceso,
+    RegistroAcceso.ipAcceso,
+]
+
+
+def _empaquetar_enteros(valores):
+    return struct.pack(f'<{len(valores)}q', *valores)
+
+
+def _empaquetar_diccionario(valores):
+    """Codificar una columna de texto como diccionario + índices"""
+    diccionario = {}
+    indices = []
+    for valor in valores:
+        if valor is None:
+            indices.append(NULO_INDICE)
+        else:
+            indices.append(diccionario.setdefault(valor, len(diccionario)))
+
+    partes = [struct.pack('<I', len(diccionario))]
+    for texto in diccionario:
+        datos = texto.encode('utf-8')
+        partes.append(struct.pack('<I', len(datos)))
+        partes.append(datos)
+    partes.append(struct.pack(f'<{len(indices)}I', *indices))
+    return b''.join(partes)
+
+
+def _empaquetar_ip(valor):
+    """Empaquetar una IP solo si al leerla se recupera exactamente el mismo texto"""
+    for tipo, familia in ((IP_V4, socket.AF_INET), (IP_V6, socket.AF_INET6)):
+        try:
+            datos = socket.inet_pton(familia, valor)
+        except (OSError, ValueError):
+            continue
+        if socket.inet_ntop(familia, datos) == valor:
+            return tipo, datos
+    return IP_TEXTO, valor.encode('utf-8')
+
+
+def _empaquetar_ips(valores):
+    tipos = bytearray()
+    por_tipo = {IP_V4: [], IP_V6: [], IP_TEXTO: []}
+    for valor in valores:
+        tipo, datos = _empaquetar_ip(valor)
+        tipos.append(tipo)
+        por_tipo[tipo].append(datos)
+
+    textos = por_tipo[IP_TEXTO]
+    return b''.join([
+        bytes(tipos),
+        b''.join(por_tipo[IP_V4]),
+        b''.join(por_tipo[IP_V6]),
+        struct.pack(f'<{len(textos)}I', *map(len, textos)),
+        b''.join(textos),
+    ])
+
+
+def _codificar_lote(filas):
+    """Convertir una lista de filas en un lote comprimido"""
+    ids, fechas, usuarios_id, usuarios, resultados, tipos, ips = zip(*filas)
+    fechas = [NULO_ENTERO if f is None else (f - EPOCH) // MICROSEGUNDO for f in fechas]
+    usuarios_id = [NULO_ENTERO if i is None else i for i in usuarios_id]
+
+    datos = b''.join([
+        _empaquetar_enteros(ids),
+        _empaquetar_enteros(fechas),
+        _empaquetar_enteros(usuarios_id),
+        _empaquetar_diccionario(usuarios),
+        _empaquetar_diccionario(resultados),
+        _empaquetar_diccionario(tipos),
+        _empaquetar_ips(ips),
+    ])
+    comprimido = zlib.compress(datos, NIVEL_COMPRESION)
+    return struct.pack('<II', len(comprimido), len(filas)) + comprimido
+
+
+def generar_exportacion(tamano_lote=TAMANO_LOTE):
+    """
+    Generar el archivo de exportación por fragmentos de bytes.
+    Lee los registros con un cursor del lado del servidor, en lotes de
+    tamano_lote filas, sin cargar todo el historial en memoria.
+    """
+    consulta = (
+        db.select(*COLUMNAS)
+        .order_by(RegistroAcceso.idRegistro)
+        .execution_options(yield_per=tamano_lote)
+    )
+    yield MAGIA + bytes([VERSION])
+    total_filas = total_lotes = 0
+    for filas in db.session.execute(consulta).partitions():
+        yield _codificar_lote(filas)
+        total_filas += len(filas)
+        total_lotes += 1
+    # Sin este final el lector considera la exportación incompleta
+    yield struct.pack('<IIQI', 0, 0, total_filas, total_lotes)
+
+
+def exportar_registros(archivo, tamano_lote=TAMANO_LOTE):
+    """Escribir la exportación en un archivo abierto en modo binario"""
+    total = 0
+    for fragmento in generar_exportacion(tamano_lote):
+        archivo.write(fragmento)
+        total += len(fragmento)
+    return total
+
+
+class _Lector:
+    """Cursor sobre los bytes descomprimidos de un lote"""
+
+    def __init__(self, datos):
+        self.datos = datos
+        self.pos = 0
+
+    def leer(self, formato):
+        valores = struct.unpack_from(formato, self.datos, self.pos)
+        self.pos += struct.calcsize(formato)
+        return valores
+
+    def leer_bytes(self, longitud):
+        datos = self.datos[self.pos:self.pos + longitud]
+        if len(datos) < longitud:
+            raise ValueError('Lote de exportación dañado')
+        self.pos += longitud
+        return datos
+
+    def leer_diccionario(self, filas):
+        (cantidad,) = self.leer('<I')
+        diccionario = []
+        for _ in range(cantidad):
+            (longitud,) = self.leer('<I')
+            diccionario.append(self.leer_bytes(longitud).decode('utf-8'))
+        return [None if i == NULO_INDICE else diccionario[i] for i in self.leer(f'<{filas}I')]
+
+    def leer_ips(self, filas):
+        tipos = self.leer_bytes(filas)
+
+        # IPv4 en bloque: un solo formateo para todas las direcciones del lote
+        cantidad = tipos.count(IP_V4)
+        v4 = ('%d.%d.%d.%d\n' * cantidad % tuple(self.leer_bytes(4 * cantidad))).split('\n')
+
+        cantidad = tipos.count(IP_V6)
+        datos = self.leer_bytes(16 * cantidad)
+        v6 = [socket.inet_ntop(socket.AF_INET6, datos[i:i + 16]) for i in range(0, len(datos), 16)]
+
+        textos = []
+        for longitud in self.leer(f'<{tipos.count(IP_TEXTO)}I'):
+            textos.append(self.leer_bytes(longitud).decode('utf-8'))
+
+        siguiente = {IP_V4: iter(v4).__next__, IP_V6: iter(v6).__next__, IP_TEXTO: iter(textos).__next__}
+        return [siguiente[tipo]() for tipo in tipos]
+
+
+def leer_lotes(archivo):
+    """
+    Leer una exportación lote por lote.
+    Cada lote es un diccionario {columna: lista de valores}; fechaHora se
+    mantiene como entero (microsegundos desde epoch) o None.
+    Lanza ValueError si el archivo está dañado, truncado o sin final.
+    """
+    cabecera = archivo.read(len(MAGIA) + 1)
+    if len(cabecera) < len(MAGIA) + 1 or cabecera[:len(MAGIA)] != MAGIA:
+        raise ValueError('El archivo no es una exportación de accesos')
+    if cabecera[len(MAGIA)] != VERSION:
+        raise ValueError(f'Versión de exportación no soportada: {cabecera[len(MAGIA)]}')
+
+    total_filas = total_lotes = 0
+    while True:
+        encabezado = archivo.read(8)
+        if len(encabezado) < 8:
+            raise ValueError('Exportación truncada')
+        longitud, filas = struct.unpack('<II', encabezado)
+        if longitud == 0:
+            final = archivo.read(12)
+            if len(final) < 12:
+                raise ValueError('Exportación truncada')
+            if struct.unpack('<QI', final) != (total_filas, total_lotes):
+                raise ValueError('Los totales de la exportación no coinciden')
+            if archivo.read(1):
+                raise ValueError('Datos después del final de la exportación')
+            return
+        comprimido = archivo.read(longitud)
+        if len(comprimido) < longitud:
+            raise ValueError('Exportación truncada')
+
+        try:
+            lector = _Lector(zlib.decompress(comprimido))
+            lote = {
+                'id': list(lector.leer(f'<{filas}q')),
+                'fecha': [None if f == NULO_ENTERO else f for f in lector.leer(f'<{filas}q')],
+                'id_usuario': [None if i == NULO_ENTERO else i for i in lector.leer(f'<{filas}q')],
+                'usuario': lector.leer_diccionario(filas),
+                'resultado': lector.leer_diccionario(filas),
+                'tipo': lector.leer_diccionario(filas),
+                'ip': lector.leer_ips(filas),
+            }
+        except (zlib.error, struct.error, IndexError, UnicodeDecodeError) as e:
+            raise ValueError('Lote de exportación dañado') from e
+        total_filas += filas
+        total_lotes += 1
+        yield lote
+
+
+def leer_registros(archivo):
+    """Leer una exportación fila por fila, con fechaHora como datetime (UTC)"""
+    for lote in leer_lotes(archivo):
+        lote['fecha'] = [None if f is None else EPOCH + f * MICROSEGUNDO for f in lote['fecha']]
+        columnas = tuple(lote)
+        for valores in zip(*lote.values()):
+            yield dict(zip(columnas, valores))
+
+
+def main(argv):
+    if len(argv) != 3 or argv[1] not in ('exportar', 'leer'):
+        print(__doc__)
+        return 1
+
+    if argv[1] == 'exportar':
+        from app import app
+        with app.app_context(), open(argv[2], 'wb') as archivo:
+            total = exportar_registros(archivo)
+        print(f'{total} bytes escritos en {argv[2]}')
+    else:
+        with open(argv[2], 'rb') as archivo:
+            for registro in leer_registros(archivo):
+                print(registro)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
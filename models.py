@@ -1,8 +1,39 @@
 from datetime import datetime
+import secrets
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy.schema import CreateTable
 from werkzeug.security import generate_password_hash, check_password_hash
 
-db = SQLAlchemy()
+
+class SesionShards(Session):
+    """Sesión que puede enviar las consultas al shard de un tenant (ver shards.py)"""
+
+    # Función sin argumentos que retorna el engine a usar, o None para el habitual
+    seleccionar_engine = None
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and SesionShards.seleccionar_engine is not None:
+            engine = SesionShards.seleccionar_engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': SesionShards})
+
+# Parámetros de hash usados para todas las contraseñas (scrypt:N:r:p)
+METODO_HASH = 'scrypt:32768:8:1'
+
+# Hash ficticio precalculado con los mismos parámetros. Se verifica cuando el
+# usuario no existe para que el costo del login sea el mismo en ambos casos.
+HASH_FICTICIO = generate_password_hash(secrets.token_urlsafe(16), method=METODO_HASH)
+
+
+def verificar_password_ficticia(password):
+    """Verificar contra el hash ficticio (siempre retorna False)"""
+    check_password_hash(HASH_FICTICIO, password)
+    return False
 
 class Cliente(db.Model):
     """RS1: Registro de nuevos usuarios"""
@@ -40,7 +71,7 @@ class Usuario(db.Model):
 
     def set_password(self, password):
         """Encriptar contraseña"""
-        self.contrasena = generate_password_hash(password)
+        self.contrasena = generate_password_hash(password, method=METODO_HASH)
     
     def check_password(self, password):
         """Verificar contraseña"""
@@ -118,8 +149,8 @@ class RegistroAcceso(db.Model):
     resultado = db.Column(db.String(20), nullable=False)  # exitoso, fallido, bloqueado
     tipoAcceso = db.Column(db.String(50), nullable=True)
     
-    # Foreign Key
-    idUser = db.Column(db.Integer, db.ForeignKey('usuario.idUser'), nullable=False)
+    # Foreign Key (nulo en intentos con un usuario inexistente)
+    idUser = db.Column(db.Integer, db.ForeignKey('usuario.idUser'), nullable=True)
     # 🌟 Relación ORM renombrada para evitar conflicto con la columna 'usuario'
     usuario_obj = db.relationship('Usuario', back_populates='accesos')
 
@@ -174,4 +205,30 @@ class Admin(db.Model):
     
     idAdmin = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False)
-    mail = db.Column(db.String(150), unique=True, nullable=False)
\ No newline at end of file
+    mail = db.Column(db.String(150), unique=True, nullable=False)
+
+
+def actualizar_esquema(engine):
+    """
+    Permitir idUser nulo en registro_acceso en bases SQLite creadas antes de
+    registrar los intentos con usuarios inexistentes. create_all no modifica
+    tablas existentes, así que la tabla se reconstruye conservando los datos.
+    """
+    conexion = engine.raw_connection()
+    try:
+        cursor = conexion.cursor()
+        columnas = cursor.execute('PRAGMA table_info(registro_acceso)').fetchall()
+        # (cid, name, type, notnull, dflt_value, pk)
+        if not any(c[1] == 'idUser' and c[3] for c in columnas):
+            return
+        nombres = ', '.join(c.name for c in RegistroAcceso.__table__.columns)
+        cursor.executescript(f'''
+            BEGIN;
+            ALTER TABLE registro_acceso RENAME TO registro_acceso_anterior;
+            {CreateTable(RegistroAcceso.__table__).compile(engine)};
+            INSERT INTO registro_acceso ({nombres}) SELECT {nombres} FROM registro_acceso_anterior;
+            DROP TABLE registro_acceso_anterior;
+            COMMIT;
+        ''')
+    finally:
+        conexion.close()
@@ -0,0 +1,239 @@
+"""
+Enrutamiento multi-tenant: cada tenant tiene su propio archivo SQLite.
+
+El tenant se indica con la cabecera X-Tenant y debe estar registrado; un
+tenant desconocido recibe 404. Sin cabecera se usa la base de datos principal
+(autenticacion.db). Las escrituras de tenants distintos van a archivos
+distintos y no compiten por el mismo bloqueo de escritura.
+
+La ubicación de cada shard se guarda en instance/shards.json.
+
+Herramientas (ejecutar con el servidor detenido):
+    flask --app app shards listar
+    flask --app app shards crear TENANT             # shard nuevo y vacío
+    flask --app app shards importar TENANT [--force]
+    flask --app app shards mover TENANT RUTA        # reubicar el archivo del shard
+
+importar copia la base principal COMPLETA (todos sus usuarios) al shard del
+tenant. Sirve para convertir una instalación de un solo cliente en un tenant;
+no reparte usuarios entre tenants, porque las tablas no tienen columna de
+tenant.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+
+import click
+from flask import g, request, jsonify, current_app, has_app_context
+from flask.cli import AppGroup
+from sqlalchemy import create_engine
+
+from models import SesionShards, actualizar_esquema
+
+CABECERA_TENANT = 'X-Tenant'
+PATRON_TENANT = re.compile(r'^[A-Za-z0-9_-]{1,50}$')
+
+
+class RegistroShards:
+    """Registro de un engine por shard, abierto bajo demanda"""
+
+    def __init__(self, directorio, archivo_registro, metadata, opciones_engine=None):
+        self.directorio = directorio
+        self.archivo_registro = archivo_registro
+        self.metadata = metadata
+        self.opciones_engine = opciones_engine or {}
+        self.engines = {}
+        self.lock = threading.Lock()
+
+        self.rutas = {}
+        if os.path.exists(archivo_registro):
+            with open(archivo_registro) as archivo:
+                self.rutas = json.load(archivo)
+
+    def validar_tenant(self, tenant):
+        if not PATRON_TENANT.match(tenant):
+            raise ValueError(f'Tenant inválido: {tenant}')
+
+    def ruta(self, tenant):
+        """Archivo SQLite del tenant (el registrado o el predeterminado)"""
+        return self.rutas.get(tenant) or os.path.abspath(os.path.join(self.directorio, f'{tenant}.db'))
+
+    def engine(self, tenant):
+        """Obtener el engine del shard de un tenant registrado"""
+        engine = self.engines.get(tenant)
+        if engine is not None:
+            return engine
+
+        with self.lock:
+            return self._abrir(tenant)
+
+    def _abrir(self, tenant):
+        """Como engine(), pero con self.lock ya tomado"""
+        engine = self.engines.get(tenant)
+        if engine is None:
+            if tenant not in self.rutas:
+                raise ValueError(f'Tenant sin shard: {tenant}')
+            engine = create_engine(f'sqlite:///{self.rutas[tenant]}', **self.opciones_engine)
+            actualizar_esquema(engine)
+            self.engines[tenant] = engine
+        return engine
+
+    def crear(self, tenant):
+        """Registrar un tenant nuevo con un shard vacío"""
+        self.validar_tenant(tenant)
+        with self.lock:
+            if tenant in self.rutas:
+                raise ValueError(f'El tenant {tenant} ya existe')
+            ruta = self.ruta(tenant)
+            if os.path.exists(ruta):
+                raise ValueError(f'El archivo {ruta} ya existe')
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            self.rutas[tenant] = ruta
+            try:
+                engine = self._abrir(tenant)
+                self.metadata.create_all(engine)
+            except Exception:
+                del self.rutas[tenant]
+                engine = self.engines.pop(tenant, None)
+                if engine is not None:
+                    engine.dispose()
+                raise
+            self.guardar()
+        return engine
+
+    def guardar(self):
+        """Escribir el registro de shards de forma atómica"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.archivo_registro)), exist_ok=True)
+        temporal = f'{self.archivo_registro}.tmp'
+        with open(temporal, 'w') as archivo:
+            json.dump(self.rutas, archivo, indent=2, sort_keys=True)
+        os.replace(temporal, self.archivo_registro)
+
+    def copiar(self, tenant, origen, forzar=False):
+        """
+        Copiar una base SQLite completa al shard del tenant.
+        Sin forzar, no sobrescribe un shard ni un archivo existente.
+        """
+        self.validar_tenant(tenant)
+        with self.lock:
+            destino = self.ruta(tenant)
+            if not forzar and (tenant in self.rutas or os.path.exists(destino)):
+                raise ValueError(f'El shard de {tenant} ya existe; use --force para sobrescribirlo')
+            if os.path.abspath(origen) == destino:
+                raise ValueError('El origen y el destino son el mismo archivo')
+            engine = self.engines.pop(tenant, None)
+            if engine is not None:
+                engine.dispose()
+            _copiar_sqlite(origen, destino)
+            self.rutas[tenant] = destino
+            self.guardar()
+
+    def mover(self, tenant, destino):
+        """Reubicar el archivo del shard de un tenant"""
+        destino = os.path.abspath(destino)
+        with self.lock:
+            if tenant not in self.rutas:
+                raise ValueError(f'Tenant sin shard: {tenant}')
+            origen = self.rutas[tenant]
+            if os.path.abspath(origen) == destino:
+                raise ValueError('El shard ya está en ese archivo')
+            if os.path.exists(destino):
+                raise ValueError(f'El archivo {destino} ya existe')
+            engine = self.engines.pop(tenant, None)
+            if engine is not None:
+                engine.dispose()
+            _copiar_sqlite(origen, destino)
+            self.rutas[tenant] = destino
+            self.guardar()
+            os.remove(origen)
+
+
+def _copiar_sqlite(origen, destino):
+    """Copia consistente usando la API de backup de SQLite"""
+    os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+    fuente = sqlite3.connect(origen)
+    copia = sqlite3.connect(destino)
+    try:
+        fuente.backup(copia)
+    finally:
+        copia.close()
+        fuente.close()
+
+
+def _engine_del_tenant():
+    """Engine del tenant de la petición actual, o None sin tenant"""
+    if has_app_context() and g.get('tenant'):
+        return current_app.extensions['shards'].engine(g.tenant)
+    return None
+
+
+def _registrar_comandos(app):
+    shards_cli = AppGroup('shards', help='Administrar los shards por tenant.')
+
+    @shards_cli.command('listar')
+    def listar_shards():
+        """Listar tenants, archivos y tamaños"""
+        registro = current_app.extensions['shards']
+        for tenant, ruta in sorted(registro.rutas.items()):
+            tamano = os.path.getsize(ruta) if os.path.exists(ruta) else 0
+            click.echo(f'{tenant:<20} {tamano:>12} B  {ruta}')
+
+    @shards_cli.command('crear')
+    @click.argument('tenant')
+    def crear_shard(tenant):
+        """Crear el shard vacío de TENANT"""
+        registro = current_app.extensions['shards']
+        try:
+            registro.crear(tenant)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f'Shard de {tenant} creado en {registro.ruta(tenant)}')
+
+    @shards_cli.command('importar')
+    @click.argument('tenant')
+    @click.option('--force', is_flag=True, help='Sobrescribir el shard existente.')
+    def importar_shard(tenant, force):
+        """Copiar la base principal completa (todos sus usuarios) al shard de TENANT"""
+        db = current_app.extensions['sqlalchemy']
+        registro = current_app.extensions['shards']
+        try:
+            registro.copiar(tenant, db.engine.url.database, forzar=force)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f'Base principal copiada a {registro.ruta(tenant)}')
+
+    @shards_cli.command('mover')
+    @click.argument('tenant')
+    @click.argument('destino')
+    def mover_shard(tenant, destino):
+        """Mover el shard de TENANT al archivo DESTINO"""
+        try:
+            current_app.extensions['shards'].mover(tenant, destino)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f'Shard de {tenant} movido a {os.path.abspath(destino)}')
+
+    app.cli.add_command(shards_cli)
+
+
+def init_app(app, db):
+    """Registrar el enrutamiento por tenant en la aplicación"""
+    directorio = app.config.setdefault('SHARDS_DIRECTORIO', os.path.join(app.instance_path, 'shards'))
+    archivo = app.config.setdefault('SHARDS_REGISTRO', os.path.join(app.instance_path, 'shards.json'))
+    opciones = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    registro = RegistroShards(directorio, archivo, db.metadata, opciones)
+    app.extensions['shards'] = registro
+    SesionShards.seleccionar_engine = _engine_del_tenant
+
+    @app.before_request
+    def seleccionar_tenant():
+        tenant = request.headers.get(CABECERA_TENANT)
+        if tenant is None:
+            return None
+        if tenant not in registro.rutas:
+            return jsonify({'error': 'Tenant no encontrado'}), 404
+        g.tenant = tenant
+
+    _registrar_comandos(app)